@@ -53,6 +53,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "corsheaders",
     "incidents",
@@ -93,7 +94,11 @@ WSGI_APPLICATION = 'incident_management.wsgi.application'
 # Kafka Configuration
 KAFKA_CONFIG = {
     'BOOTSTRAP_SERVERS': ['localhost:9092'],
-    'INCIDENT_TOPIC': 'incidents-created'
+    'INCIDENT_TOPIC': 'incidents-created',
+    # Event encoding: 'json' (readable by any client) or 'msgpack' (compact, in-house consumers only)
+    'SERIALIZER': 'json',
+    # Send the consumer's notification emails instead of only logging them
+    'SEND_EMAILS': False,
 }
 
 
@@ -115,6 +120,10 @@ DATABASES = {
         'PASSWORD': 'incident_pass',
         'HOST': 'localhost',
         'PORT': '5433',
+        # Reuse connections across requests instead of reconnecting each time;
+        # health checks discard connections the server has dropped
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
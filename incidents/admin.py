@@ -16,6 +16,9 @@ class IncidentAdmin(admin.ModelAdmin):
     list_filter = ['status', 'priority', 'category', 'created_at']
     search_fields = ['title', 'description', 'reported_by__username']
     list_editable = ['status', 'priority', 'assigned_to']
+    list_select_related = ['reported_by', 'assigned_to']
+    autocomplete_fields = ['reported_by', 'assigned_to']
+    list_per_page = 50
     
     fieldsets = (
         ('Basic Information', {
@@ -34,11 +37,6 @@ class IncidentAdmin(admin.ModelAdmin):
     )
     
     readonly_fields = ['created_at', 'updated_at']
-    
-    def get_queryset(self, request):
-        return super().get_queryset(request).select_related(
-            'reported_by', 'assigned_to'
-        )
 
 
 @admin.register(IncidentComment)
@@ -50,11 +48,9 @@ class IncidentCommentAdmin(admin.ModelAdmin):
     list_filter = ['created_at', 'author']
     search_fields = ['content', 'incident__title', 'author__username']
     readonly_fields = ['created_at']
-    
-    def get_queryset(self, request):
-        return super().get_queryset(request).select_related(
-            'incident', 'author'
-        )
+    list_select_related = ['incident', 'author']
+    raw_id_fields = ['incident']
+    list_per_page = 50
 
 
 @admin.register(IncidentAttachment)
@@ -66,8 +62,6 @@ class IncidentAttachmentAdmin(admin.ModelAdmin):
     list_filter = ['uploaded_at', 'uploaded_by']
     search_fields = ['filename', 'incident__title']
     readonly_fields = ['uploaded_at']
-    
-    def get_queryset(self, request):
-        return super().get_queryset(request).select_related(
-            'incident', 'uploaded_by'
-        )
\ No newline at end of file
+    list_select_related = ['incident', 'uploaded_by']
+    raw_id_fields = ['incident']
+    list_per_page = 50
\ No newline at end of file
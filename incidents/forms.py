@@ -1,8 +1,15 @@
 from django import forms
 from django.contrib.auth.models import User
+from django.db.models import Q
 from .models import Incident, IncidentComment, IncidentAttachment
 
 
+# Filter choices for IncidentSearchForm, built once at import
+_STATUS_CHOICES = (('', 'All Statuses'),) + tuple(Incident.STATUS_CHOICES)
+_PRIORITY_CHOICES = (('', 'All Priorities'),) + tuple(Incident.PRIORITY_CHOICES)
+_CATEGORY_CHOICES = (('', 'All Categories'),) + tuple(Incident.CATEGORY_CHOICES)
+_ASSIGNED_CHOICES = (('', 'All Assignments'), ('me', 'My Incidents'))
+
 class IncidentForm(forms.ModelForm):
     """
     Form for creating and updating incidents
@@ -29,8 +36,11 @@ class IncidentForm(forms.ModelForm):
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # Populate assigned_to with all users
-        self.fields['assigned_to'].queryset = User.objects.all()
+        # Populate assigned_to with active users (keeping the current assignee),
+        # fetching only the columns the <select> renders
+        self.fields['assigned_to'].queryset = User.objects.filter(
+            Q(is_active=True) | Q(pk=self.instance.assigned_to_id)
+        ).order_by('username').only('id', 'username')
         self.fields['assigned_to'].empty_label = "-- Select assignee --"
         
         # Make fields required
@@ -73,25 +83,25 @@ class IncidentSearchForm(forms.Form):
     )
     
     status = forms.ChoiceField(
-        choices=[('', 'All Statuses')] + Incident.STATUS_CHOICES,
+        choices=_STATUS_CHOICES,
         required=False,
         widget=forms.Select(attrs={'class': 'form-control'})
     )
     
     priority = forms.ChoiceField(
-        choices=[('', 'All Priorities')] + Incident.PRIORITY_CHOICES,
+        choices=_PRIORITY_CHOICES,
         required=False,
         widget=forms.Select(attrs={'class': 'form-control'})
     )
     
     category = forms.ChoiceField(
-        choices=[('', 'All Categories')] + Incident.CATEGORY_CHOICES,
+        choices=_CATEGORY_CHOICES,
         required=False,
         widget=forms.Select(attrs={'class': 'form-control'})
     )
     
     assigned = forms.ChoiceField(
-        choices=[('', 'All Assignments'), ('me', 'My Incidents')],
+        choices=_ASSIGNED_CHOICES,
         required=False,
         widget=forms.Select(attrs={'class': 'form-control'})
     )
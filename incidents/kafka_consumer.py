@@ -1,18 +1,37 @@
-import json
 import logging
+import orjson
 import threading
 import signal
 import sys
-from typing import Dict, Any, Callable
-from kafka import KafkaConsumer
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+from typing import Dict, Any, List
+from confluent_kafka import Consumer, TopicPartition
 from django.conf import settings
-from django.core.mail import send_mail
+from django.core.mail import get_connection, send_mass_mail
+from django.db import close_old_connections
 from django.template.loader import render_to_string
 from django.contrib.auth.models import User
+from .kafka_serialization import deserialize_event
 from .models import Incident
 
 logger = logging.getLogger(__name__)
 
+# How long the list of staff email recipients is reused before re-querying
+ADMIN_EMAILS_TTL = 60
+
+NOTIFICATION_FROM_EMAIL = 'incidents@company.com'
+
+# Maximum number of messages handed to process_batch per consume() call
+CONSUME_BATCH_SIZE = 500
+
+# Upper bound on partitions of one batch processed in parallel
+PARTITION_WORKERS = 32
+
+# Seconds to wait before re-reading a partition whose batch failed
+RETRY_BACKOFF = 5
+
 class IncidentEventConsumer:
     """
     Kafka consumer for processing incident events
@@ -21,27 +40,31 @@ class IncidentEventConsumer:
     def __init__(self):
         self.consumer = None
         self.running = False
-        self.event_handlers = {
-            'incident_created': self.handle_incident_created,
-            'status_updated': self.handle_status_updated,
-        }
+        self._admin_emails_cache = (None, [])
     
     def get_kafka_consumer(self):
         """Create and return Kafka consumer instance"""
         try:
-            consumer = KafkaConsumer(
-                settings.KAFKA_CONFIG['INCIDENT_TOPIC'],
-                bootstrap_servers=settings.KAFKA_CONFIG['BOOTSTRAP_SERVERS'],
-                value_deserializer=lambda v: json.loads(v.decode('utf-8')),
-                key_deserializer=lambda k: k.decode('utf-8') if k else None,
-                group_id='incident-management-consumer',
-                auto_offset_reset='latest',
-                enable_auto_commit=True,
-                consumer_timeout_ms=1000,
-            )
+            consumer = Consumer({
+                'bootstrap.servers': ','.join(settings.KAFKA_CONFIG['BOOTSTRAP_SERVERS']),
+                'group.id': 'incident-management-consumer',
+                'auto.offset.reset': 'latest',
+                'enable.auto.commit': False,
+                # Fetch tuning, so each round trip carries a full batch:
+                # - fetch.min.bytes / fetch.wait.max.ms: the broker holds a fetch
+                #   until 64 KiB is available or 500 ms have passed
+                # - fetch.max.bytes: upper bound on one fetch response (50 MiB)
+                # - max.partition.fetch.bytes: per-partition share of a fetch (10 MiB)
+                # Producer-side lz4 compression keeps these batches small on the wire.
+                'fetch.min.bytes': 65536,
+                'fetch.wait.max.ms': 500,
+                'fetch.max.bytes': 52428800,
+                'max.partition.fetch.bytes': 10485760,
+            })
+            consumer.subscribe([settings.KAFKA_CONFIG['INCIDENT_TOPIC']])
             return consumer
         except Exception as e:
-            logger.error(f"Failed to create Kafka consumer: {e}")
+            logger.error("Failed to create Kafka consumer: %s", e)
             return None
     
     def start_consuming(self):
@@ -54,51 +77,208 @@ class IncidentEventConsumer:
         self.running = True
         logger.info("Starting Kafka consumer for incident events...")
         
-        # Set up signal handlers for graceful shutdown
-        signal.signal(signal.SIGINT, self.shutdown)
-        signal.signal(signal.SIGTERM, self.shutdown)
+        # Set up signal handlers for graceful shutdown; the consumer is only
+        # closed in the finally block, after the last batch has been committed
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        
+        # Threads are only started as partitions need them, so the pool never
+        # grows past min(PARTITION_WORKERS, partitions per batch)
+        executor = ThreadPoolExecutor(max_workers=PARTITION_WORKERS, thread_name_prefix='incident-partition')
+        
+        # Bind hot attribute lookups once instead of on every iteration
+        consume = self.consumer.consume
+        process = self.process_partition
         
         try:
             while self.running:
                 try:
-                    message_batch = self.consumer.poll(timeout_ms=1000)
-                    for topic_partition, messages in message_batch.items():
-                        for message in messages:
-                            self.process_message(message)
+                    messages = consume(num_messages=CONSUME_BATCH_SIZE, timeout=5.0)
+                    if not messages:
+                        continue
+                    
+                    partition_batches = self.split_by_partition(messages)
+                    if len(partition_batches) == 1:
+                        handled = [process(partition_batches[0])]
+                    else:
+                        # Partitions run in parallel. Within a partition, events are
+                        # handled grouped by type, so handlers must not rely on the
+                        # order of events of different types
+                        handled = list(executor.map(process, partition_batches))
+                    
+                    self.commit_or_rewind(partition_batches, handled)
                 except Exception as e:
-                    logger.error(f"Error polling messages: {e}")
+                    logger.error("Error polling messages: %s", e)
                     
         except KeyboardInterrupt:
             logger.info("Consumer interrupted by user")
         finally:
+            executor.shutdown(wait=True)
             self.shutdown()
     
-    def process_message(self, message):
-        """Process a single Kafka message"""
+    def split_by_partition(self, messages) -> List[list]:
+        """Split a consumed batch into per-partition lists, keeping message order"""
+        partitions = {}
+        for message in messages:
+            partitions.setdefault((message.topic(), message.partition()), []).append(message)
+        return list(partitions.values())
+    
+    def process_partition(self, messages) -> bool:
+        """Process one partition's messages, returning whether they were handled"""
         try:
-            event_data = message.value
-            event_type = event_data.get('event_type')
-            
-            logger.info(f"Processing event: {event_type} for incident {event_data.get('incident_id')}")
-            
-            if event_type in self.event_handlers:
-                handler = self.event_handlers[event_type]
-                handler(event_data)
+            self.process_batch(messages)
+            return True
+        except Exception as e:
+            logger.error("Error processing batch, it will be retried: %s", e)
+            return False
+    
+    def commit_or_rewind(self, partition_batches, handled: List[bool]):
+        """
+        Commit the offsets of handled partitions and seek failed ones back to
+        their first message, so the next consume() retries them
+        """
+        offsets = []
+        rewinds = []
+        for messages, ok in zip(partition_batches, handled):
+            consumed = [message for message in messages if message.error() is None]
+            if not consumed:
+                # Only error events (e.g. partition EOF): nothing to commit
+                continue
+            first, last = consumed[0], consumed[-1]
+            if ok:
+                offsets.append(TopicPartition(last.topic(), last.partition(), last.offset() + 1))
             else:
-                logger.warning(f"No handler found for event type: {event_type}")
-                
+                rewinds.append(TopicPartition(first.topic(), first.partition(), first.offset()))
+        
+        if offsets:
+            self.consumer.commit(offsets=offsets, asynchronous=False)
+        for partition in rewinds:
+            self.consumer.seek(partition)
+        if rewinds:
+            time.sleep(RETRY_BACKOFF)
+    
+    def process_batch(self, messages):
+        """Decode a batch of Kafka messages and dispatch them grouped by event type"""
+        events = []
+        append = events.append
+        for message in messages:
+            if message.error():
+                logger.error("Kafka consumer error: %s", message.error())
+                continue
+            try:
+                event = deserialize_event(message.value())
+            except ValueError as e:
+                logger.error("Error decoding message: %s", e)
+                logger.error("Message content: %s", message.value())
+                continue
+            # Malformed events are skipped here so they cannot fail the
+            # batch handler for the rest of their group
+            if not self.is_valid_event(event):
+                logger.error("Skipping malformed event: %s", message.value())
+                continue
+            append(event)
+        
+        def event_type_of(event):
+            return event['event_type']
+        
+        groups = [
+            (event_type, list(group))
+            for event_type, group in groupby(sorted(events, key=event_type_of), key=event_type_of)
+        ]
+        if not groups:
+            return
+        
+        try:
+            # Queries run on this worker's own connection, so partitions
+            # processed in parallel overlap their DB and email work
+            lookups = self.load_batch_lookups(groups)
+            emails = []
+            for event_type, batch in groups:
+                emails.extend(self.dispatch_group(event_type, batch, lookups))
+            
+            # One SMTP connection for every email produced by the batch
+            self.send_email_batch(emails)
+        finally:
+            close_old_connections()
+    
+    def load_batch_lookups(self, groups) -> Dict[str, Any]:
+        """Fetch the rows the batch handlers need with one query per table"""
+        created_ids = [
+            event['incident_id']
+            for event_type, batch in groups if event_type == 'incident_created'
+            for event in batch
+        ]
+        if not created_ids:
+            return {'incidents': {}, 'admin_emails': []}
+        return {
+            'incidents': Incident.objects.select_related('assigned_to', 'reported_by').in_bulk(created_ids),
+            'admin_emails': self.get_admin_emails(),
+        }
+    
+    def is_valid_event(self, event) -> bool:
+        """Check that a decoded payload has the fields every handler relies on"""
+        return (
+            isinstance(event, dict)
+            and isinstance(event.get('event_type'), str)
+            and isinstance(event.get('incident_id'), int)
+        )
+    
+    def dispatch_group(self, event_type: str, batch: List[Dict[str, Any]], lookups: Dict[str, Any]) -> List[tuple]:
+        """Hand all events of one type to its batch handler"""
+        handler = _DISPATCH.get(event_type)
+        if handler is None:
+            logger.warning("No handler found for event type: %s", event_type)
+            return []
+        
+        logger.info("Processing %s %s event(s)", len(batch), event_type)
+        try:
+            return handler(self, batch, lookups)
         except Exception as e:
-            logger.error(f"Error processing message: {e}")
-            logger.error(f"Message content: {message.value}")
+            logger.error("Error processing %s batch: %s", event_type, e)
+            return []
+    
+    def handle_incident_created_batch(self, events: List[Dict[str, Any]], lookups: Dict[str, Any]) -> List[tuple]:
+        """Handle a batch of incident creation events, returning their notification emails"""
+        incidents = lookups['incidents']
+        admin_emails = lookups['admin_emails']
+        
+        emails = []
+        for event_data in events:
+            emails.extend(self.handle_incident_created(
+                event_data, incidents.get(event_data['incident_id']), admin_emails
+            ))
+        return emails
+    
+    def get_admin_emails(self) -> List[str]:
+        """Return staff email addresses, cached for ADMIN_EMAILS_TTL seconds"""
+        fetched_at, emails = self._admin_emails_cache
+        now = time.monotonic()
+        if fetched_at is None or now - fetched_at > ADMIN_EMAILS_TTL:
+            emails = list(
+                User.objects.filter(is_staff=True, email__isnull=False).exclude(email='')
+                .values_list('email', flat=True)
+            )
+            self._admin_emails_cache = (now, emails)
+        return emails
     
-    def handle_incident_created(self, event_data: Dict[str, Any]):
-        """Handle incident creation events"""
+    def handle_status_updated_batch(self, events: List[Dict[str, Any]], lookups: Dict[str, Any]) -> List[tuple]:
+        """Handle a batch of incident status update events"""
+        for event_data in events:
+            self.handle_status_updated(event_data)
+        return []
+    
+    def handle_incident_created(self, event_data: Dict[str, Any], incident, admin_emails: List[str]) -> List[tuple]:
+        """
+        Handle incident creation events, returning the notification emails
+        for the batch handler to send
+        """
+        emails = []
         try:
             incident_id = event_data['incident_id']
-            logger.info(f"Handling incident creation: {incident_id}")
+            logger.info("Handling incident creation: %s", incident_id)
             
-            # Send email notification to administrators
-            self.send_incident_email_notification(event_data, 'created')
+            # Prepare email notification to administrators
+            emails = self.build_incident_emails(event_data, 'created', incident, admin_emails)
             
             # Check for high priority incidents and trigger escalation
             if event_data.get('priority') in ['high', 'critical']:
@@ -107,10 +287,11 @@ class IncidentEventConsumer:
             # Log incident metrics
             self.log_incident_metrics(event_data, 'created')
             
-            logger.info(f"Successfully processed incident creation: {incident_id}")
+            logger.info("Successfully processed incident creation: %s", incident_id)
             
         except Exception as e:
-            logger.error(f"Error handling incident creation: {e}")
+            logger.error("Error handling incident creation: %s", e)
+        return emails
     
     def handle_status_updated(self, event_data: Dict[str, Any]):
         """Handle incident status update events"""
@@ -119,7 +300,7 @@ class IncidentEventConsumer:
             old_status = event_data.get('old_status')
             new_status = event_data.get('new_status')
             
-            logger.info(f"Handling status update for incident {incident_id}: {old_status} -> {new_status}")
+            logger.info("Handling status update for incident %s: %s -> %s", incident_id, old_status, new_status)
             
             # Send email notification for status change
             self.send_status_update_email(event_data)
@@ -131,23 +312,24 @@ class IncidentEventConsumer:
             # Log status change metrics
             self.log_incident_metrics(event_data, 'status_updated')
             
-            logger.info(f"Successfully processed status update for incident: {incident_id}")
+            logger.info("Successfully processed status update for incident: %s", incident_id)
             
         except Exception as e:
-            logger.error(f"Error handling status update: {e}")
+            logger.error("Error handling status update: %s", e)
     
-    def send_incident_email_notification(self, event_data: Dict[str, Any], action: str):
-        """Send email notification for incident events"""
+    def build_incident_emails(self, event_data: Dict[str, Any], action: str, incident, admin_emails: List[str]) -> List[tuple]:
+        """
+        Build the (subject, message, from_email, recipient_list) tuples for an
+        incident event, rendering the message body once for all recipients
+        """
         try:
             subject = f"[Incident Management] New {action.title()} Incident #{event_data['incident_id']}"
             
-            # Get incident details
+            # Incident details are fetched in bulk by load_batch_lookups
             incident_id = event_data['incident_id']
-            try:
-                incident = Incident.objects.get(id=incident_id)
-            except Incident.DoesNotExist:
-                logger.warning(f"Incident {incident_id} not found in database")
-                return
+            if incident is None:
+                logger.warning("Incident %s not found in database", incident_id)
+                return []
             
             # Prepare email context
             context = {
@@ -156,34 +338,41 @@ class IncidentEventConsumer:
                 'action': action,
             }
             
-            # Get email recipients (administrators and assigned user)
-            recipients = []
-            
-            # Add administrators
-            admin_users = User.objects.filter(is_staff=True, email__isnull=False).exclude(email='')
-            recipients.extend([user.email for user in admin_users])
-            
-            # Add assigned user
-            if incident.assigned_to and incident.assigned_to.email:
-                recipients.append(incident.assigned_to.email)
-            
-            if recipients:
-                # For now, we'll log the email instead of sending
-                # In production, uncomment the send_mail line
-                logger.info(f"Would send email to: {recipients}")
-                logger.info(f"Subject: {subject}")
-                logger.info(f"Incident: {incident.title} ({incident.priority} priority)")
-                
-                # send_mail(
-                #     subject=subject,
-                #     message=f"Incident #{incident.id}: {incident.title}\nPriority: {incident.priority}\nStatus: {incident.status}",
-                #     from_email='incidents@company.com',
-                #     recipient_list=recipients,
-                #     fail_silently=False,
-                # )
+            # Get email recipients (administrators and assigned user);
+            # checking assigned_to_id first avoids loading an unset relation
+            recipients = admin_emails + (
+                [incident.assigned_to.email]
+                if incident.assigned_to_id and incident.assigned_to.email else []
+            )
+            
+            if not recipients:
+                return []
+            
+            message = render_to_string('incidents/email/incident_created.txt', context)
+            return [(subject, message, NOTIFICATION_FROM_EMAIL, [recipient]) for recipient in recipients]
             
         except Exception as e:
-            logger.error(f"Error sending email notification: {e}")
+            logger.error("Error building email notification: %s", e)
+            return []
+    
+    def send_email_batch(self, datatuple: List[tuple]):
+        """Send all notification emails of a batch over a single connection"""
+        if not datatuple:
+            return
+        
+        try:
+            # Emails are only logged unless KAFKA_CONFIG['SEND_EMAILS'] is set
+            if not settings.KAFKA_CONFIG.get('SEND_EMAILS', False):
+                for subject, message, from_email, recipient_list in datatuple:
+                    logger.info("Would send email to: %s", recipient_list)
+                    logger.info("Subject: %s", subject)
+                return
+            
+            with get_connection() as connection:
+                send_mass_mail(datatuple, fail_silently=False, connection=connection)
+            
+        except Exception as e:
+            logger.error("Error sending email notifications: %s", e)
     
     def send_status_update_email(self, event_data: Dict[str, Any]):
         """Send email notification for status updates"""
@@ -195,10 +384,10 @@ class IncidentEventConsumer:
             subject = f"[Incident Management] Status Update - Incident #{incident_id}"
             message = f"Incident #{incident_id} status changed from '{old_status}' to '{new_status}'"
             
-            logger.info(f"Status update notification: {message}")
+            logger.info("Status update notification: %s", message)
             
         except Exception as e:
-            logger.error(f"Error sending status update email: {e}")
+            logger.error("Error sending status update email: %s", e)
     
     def trigger_escalation(self, event_data: Dict[str, Any]):
         """Trigger escalation for high priority incidents"""
@@ -206,7 +395,7 @@ class IncidentEventConsumer:
             incident_id = event_data['incident_id']
             priority = event_data.get('priority')
             
-            logger.warning(f"ESCALATION TRIGGERED: High priority incident #{incident_id} ({priority})")
+            logger.warning("ESCALATION TRIGGERED: High priority incident #%s (%s)", incident_id, priority)
             
             # Here you could:
             # - Send SMS to on-call engineers
@@ -223,16 +412,16 @@ class IncidentEventConsumer:
             }
             
             # For demonstration, we'll just log the escalation
-            logger.critical(f"🚨 ESCALATION: {escalation_message}")
+            logger.critical("🚨 ESCALATION: %s", escalation_message)
             
         except Exception as e:
-            logger.error(f"Error triggering escalation: {e}")
+            logger.error("Error triggering escalation: %s", e)
     
     def handle_incident_resolved(self, event_data: Dict[str, Any]):
         """Handle incident resolution"""
         try:
             incident_id = event_data['incident_id']
-            logger.info(f"🎉 Incident #{incident_id} has been RESOLVED!")
+            logger.info("🎉 Incident #%s has been RESOLVED!", incident_id)
             
             # Calculate resolution time, send notifications, update metrics
             # This is where you might:
@@ -241,10 +430,14 @@ class IncidentEventConsumer:
             # - Trigger post-incident review processes
             
         except Exception as e:
-            logger.error(f"Error handling incident resolution: {e}")
+            logger.error("Error handling incident resolution: %s", e)
     
     def log_incident_metrics(self, event_data: Dict[str, Any], event_type: str):
         """Log incident metrics for monitoring and analytics"""
+        # Metrics are only logged for now, so skip building them when INFO is filtered out
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        
         try:
             metrics = {
                 'timestamp': event_data.get('created_at') or event_data.get('updated_at'),
@@ -256,20 +449,33 @@ class IncidentEventConsumer:
             }
             
             # Log metrics (in production, send to monitoring system)
-            logger.info(f"METRICS: {json.dumps(metrics)}")
+            logger.info("METRICS: %s", orjson.dumps(metrics).decode())
             
         except Exception as e:
-            logger.error(f"Error logging metrics: {e}")
+            logger.error("Error logging metrics: %s", e)
+    
+    def stop(self, signum=None, frame=None):
+        """Ask the consume loop to exit once the current batch is committed"""
+        logger.info("Stopping Kafka consumer after the current batch...")
+        self.running = False
     
-    def shutdown(self, signum=None, frame=None):
+    def shutdown(self):
         """Gracefully shutdown the consumer"""
         logger.info("Shutting down Kafka consumer...")
         self.running = False
         if self.consumer:
             self.consumer.close()
+            self.consumer = None
         logger.info("Kafka consumer stopped")
 
 
+# Batch handler for each event type, resolved with a single dict lookup
+_DISPATCH = {
+    'incident_created': IncidentEventConsumer.handle_incident_created_batch,
+    'status_updated': IncidentEventConsumer.handle_status_updated_batch,
+}
+
+
 def run_consumer():
     """Entry point to run the consumer"""
     consumer = IncidentEventConsumer()
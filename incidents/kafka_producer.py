@@ -1,30 +1,150 @@
-import json
+import atexit
 import logging
-from kafka import KafkaProducer
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from confluent_kafka import Producer
 from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .kafka_serialization import serialize_event
+from .models import Incident
 
 logger = logging.getLogger(__name__)
 
 _producer = None
+_producer_lock = threading.Lock()
+
+# Sends queued by views run here, off the request thread
+_notification_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='kafka-notify')
+
+# Seconds to wait for the broker when a caller asks for a synchronous send
+SYNC_SEND_TIMEOUT = 10
+
+
+def _delivery_report(err, msg):
+    """
+    Delivery callback for produced records. Sends are fire-and-forget, so this
+    is where broker failures surface; it runs on the poller thread.
+    """
+    if err is not None:
+        logger.error("Kafka delivery failed for %s on topic %s: %s", msg.key(), msg.topic(), err)
+    else:
+        logger.debug("Kafka delivered %s to %s [%s] at offset %s", msg.key(), msg.topic(), msg.partition(), msg.offset())
+
+
+def _poll_forever(producer):
+    """Serve delivery callbacks for the shared producer off the request thread"""
+    while True:
+        producer.poll(1.0)
+
 
 def get_kafka_producer():
     global _producer
-    if _producer is None:
+    if _producer is not None:
+        return _producer
+    with _producer_lock:
+        if _producer is not None:
+            return _producer
         try:
-            _producer = KafkaProducer(
-                bootstrap_servers=settings.KAFKA_CONFIG['BOOTSTRAP_SERVERS'],
-                value_serializer=lambda v: json.dumps(v).encode('utf-8'),
-                key_serializer=lambda k: k.encode('utf-8') if k else None
-            )
+            producer = Producer({
+                'bootstrap.servers': ','.join(settings.KAFKA_CONFIG['BOOTSTRAP_SERVERS']),
+                'acks': 1,
+                'linger.ms': 20,
+                'batch.size': 65536,
+                'compression.type': 'lz4',
+                'batch.num.messages': 10000,
+                'queue.buffering.max.kbytes': 1048576,
+            })
         except Exception as e:
-            logger.error(f"Failed to create Kafka producer: {e}")
+            logger.error("Failed to create Kafka producer: %s", e)
             return None
+        threading.Thread(
+            target=_poll_forever, args=(producer,), name='kafka-producer-poller', daemon=True
+        ).start()
+        _producer = producer
     return _producer
 
 
-def send_incident_notification(incident):
+def _drain_producer():
+    """Deliver any buffered records before the process exits"""
+    if _producer is not None:
+        _producer.flush(SYNC_SEND_TIMEOUT)
+
+
+atexit.register(_drain_producer)
+
+
+def _wait_for_delivery(producer, sync):
     """
-    Send incident notification to Kafka topic
+    Block until the record is acknowledged when the caller asked for a
+    synchronous send; otherwise the poller thread serves its callback
+    """
+    if not sync:
+        return True
+    return producer.flush(SYNC_SEND_TIMEOUT) == 0
+
+
+def _incident_created_message(incident):
+    """Build the incident_created event payload"""
+    return {
+        'incident_id': incident.id,
+        'title': incident.title,
+        'priority': incident.priority,
+        'status': incident.status,
+        'category': incident.category,
+        'reported_by': incident.reported_by.username,
+        'assigned_to': incident.assigned_to.username if incident.assigned_to else None,
+        'created_at': incident.created_at,
+        'event_type': 'incident_created'
+    }
+
+
+def _status_updated_message(incident, old_status, new_status):
+    """Build the status_updated event payload"""
+    return {
+        'incident_id': incident.id,
+        'title': incident.title,
+        'old_status': old_status,
+        'new_status': new_status,
+        'priority': incident.priority,
+        'assigned_to': incident.assigned_to.username if incident.assigned_to else None,
+        'updated_at': incident.updated_at,
+        'event_type': 'status_updated'
+    }
+
+
+def _run_in_background(func, *args):
+    """Run func on the notification pool, releasing its DB connection afterwards"""
+    def run():
+        try:
+            func(*args)
+        finally:
+            close_old_connections()
+    _notification_executor.submit(run)
+
+
+def notify_incident_created(incident_id):
+    """
+    Queue an incident_created notification to be sent from a worker thread
+    once the current transaction commits
+    """
+    transaction.on_commit(lambda: _run_in_background(send_incident_notification, incident_id))
+
+
+def notify_status_updated(incident_id, old_status, new_status):
+    """
+    Queue a status_updated notification to be sent from a worker thread
+    once the current transaction commits
+    """
+    transaction.on_commit(
+        lambda: _run_in_background(send_status_update_notification, incident_id, old_status, new_status)
+    )
+
+
+def send_incident_notification(incident_id, sync=False):
+    """
+    Send incident notification to Kafka topic.
+    Records are batched by the producer unless sync=True is passed.
     """
     producer = get_kafka_producer()
     if not producer:
@@ -32,35 +152,29 @@ def send_incident_notification(incident):
         return False
     
     try:
+        incident = Incident.objects.select_related('reported_by', 'assigned_to').get(pk=incident_id)
+        
         # Prepare notification message
-        message = {
-            'incident_id': incident.id,
-            'title': incident.title,
-            'priority': incident.priority,
-            'status': incident.status,
-            'category': incident.category,
-            'reported_by': incident.reported_by.username,
-            'assigned_to': incident.assigned_to.username if incident.assigned_to else None,
-            'created_at': incident.created_at.isoformat(),
-            'event_type': 'incident_created'
-        }
+        message = _incident_created_message(incident)
         
         # Send to Kafka topic
         topic = settings.KAFKA_CONFIG['INCIDENT_TOPIC']
-        future = producer.send(
-            topic=topic,
-            key=f"incident_{incident.id}",
-            value=message
+        producer.produce(
+            topic,
+            key=f"incident_{incident_id}",
+            value=serialize_event(message),
+            callback=_delivery_report
         )
         
-        # Wait for message to be sent
-        producer.flush()
+        if not _wait_for_delivery(producer, sync):
+            logger.error("Timed out waiting for Kafka to acknowledge incident %s", incident_id)
+            return False
         
-        logger.info(f"Incident notification sent to Kafka: {incident.id}")
+        logger.info("Incident notification %s to Kafka: %s", "sent" if sync else "queued", incident_id)
         return True
         
     except Exception as e:
-        logger.error(f"Failed to send incident notification: {e}")
+        logger.error("Failed to send incident notification: %s", e)
         return False
     
     # finally:
@@ -68,41 +182,40 @@ def send_incident_notification(incident):
     #         producer.close()
 
 
-def send_status_update_notification(incident, old_status, new_status):
+def send_status_update_notification(incident_id, old_status, new_status, sync=False):
     """
-    Send status update notification to Kafka
+    Send status update notification to Kafka.
+    Records are batched by the producer unless sync=True is passed.
     """
     producer = get_kafka_producer()
     if not producer:
         return False
     
     try:
-        message = {
-            'incident_id': incident.id,
-            'title': incident.title,
-            'old_status': old_status,
-            'new_status': new_status,
-            'priority': incident.priority,
-            'assigned_to': incident.assigned_to.username if incident.assigned_to else None,
-            'updated_at': incident.updated_at.isoformat(),
-            'event_type': 'status_updated'
-        }
+        incident = Incident.objects.select_related('assigned_to').get(pk=incident_id)
+        message = _status_updated_message(incident, old_status, new_status)
         
         topic = settings.KAFKA_CONFIG['INCIDENT_TOPIC']
-        producer.send(
-            topic=topic,
-            key=f"incident_{incident.id}_status",
-            value=message
+        producer.produce(
+            topic,
+            key=f"incident_{incident_id}_status",
+            value=serialize_event(message),
+            callback=_delivery_report
         )
         
-        producer.flush()
-        logger.info(f"Status update notification sent: {incident.id} ({old_status} -> {new_status})")
+        if not _wait_for_delivery(producer, sync):
+            logger.error("Timed out waiting for Kafka to acknowledge status update for incident %s", incident_id)
+            return False
+        logger.info(
+            "Status update notification %s: %s (%s -> %s)",
+            "sent" if sync else "queued", incident_id, old_status, new_status
+        )
         return True
         
     except Exception as e:
-        logger.error(f"Kafka send failed for incident {incident.id}, event_type={message['event_type']} on topic {topic}: {e}")
+        logger.error("Kafka send failed for incident %s, event_type=status_updated: %s", incident_id, e)
         return False
     
     # finally:
     #     if producer:
-    #         producer.close()
\ No newline at end of file
+    #         producer.close()
@@ -0,0 +1,57 @@
+import logging
+from functools import lru_cache
+
+import msgpack
+import orjson
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _orjson_dumps(event):
+    return orjson.dumps(event, option=orjson.OPT_NAIVE_UTC)
+
+
+def _msgpack_dumps(event):
+    return msgpack.packb(event, use_bin_type=True, datetime=True)
+
+
+def _msgpack_loads(data):
+    return msgpack.unpackb(data, raw=False, timestamp=3)
+
+
+# Event codecs by KAFKA_CONFIG['SERIALIZER'] name: (dumps, loads)
+CODECS = {
+    'json': (_orjson_dumps, orjson.loads),
+    'msgpack': (_msgpack_dumps, _msgpack_loads),
+}
+
+
+@lru_cache(maxsize=None)
+def _resolve_codec(name):
+    if name not in CODECS:
+        logger.warning("Unknown Kafka serializer %r, falling back to json", name)
+        name = 'json'
+    return CODECS[name]
+
+
+def get_event_codec():
+    """
+    Return the (dumps, loads) pair for incident events. JSON is the default
+    so external consumers can read the topic; msgpack is smaller and faster
+    when every producer and consumer is this application.
+
+    The setting is read on every call and the cache is keyed on its value,
+    so override_settings takes effect.
+    """
+    return _resolve_codec(settings.KAFKA_CONFIG.get('SERIALIZER', 'json'))
+
+
+def serialize_event(event):
+    """Encode an event payload for Kafka"""
+    return get_event_codec()[0](event)
+
+
+def deserialize_event(data):
+    """Decode an event payload read from Kafka"""
+    return get_event_codec()[1](data)
@@ -1,16 +1,34 @@
 from django.core.management.base import BaseCommand
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
-from incidents.models import Incident, Category, Priority, Status
+from django.db import connection, transaction
+from incidents.models import Incident, Category, Priority, Status, incident_search_vector
+import os
 import random
 from datetime import datetime, timedelta
 from django.utils import timezone
 
+# Rows per INSERT in bulk_create. An incident binds about 10 parameters, so
+# 1000 rows stays far below PostgreSQL's 65535-parameter limit; set the
+# environment variable to 90 or less on SQLite, which allows 999 per statement.
+INCIDENT_BULK_BATCH = int(os.environ.get('INCIDENT_BULK_BATCH', '1000'))
+
 class Command(BaseCommand):
     help = 'Create sample data for testing'
 
+    @transaction.atomic
     def handle(self, *args, **options):
+        if options.get('clear'):
+            self.stdout.write('Clearing existing data...')
+            # TRUNCATE empties the table without logging every deleted row;
+            # CASCADE also clears the incident comments and attachments
+            table = connection.ops.quote_name(Incident._meta.db_table)
+            with connection.cursor() as cursor:
+                cursor.execute(f'TRUNCATE TABLE {table} RESTART IDENTITY CASCADE')
+            User.objects.filter(is_superuser=False).delete()
+            self.stdout.write('Existing data cleared.')
+
         # Create users if they don't exist
-        users = []
         user_data = [
             ('admin', 'admin@example.com', 'Admin', 'User'),
             ('john_doe', 'john@example.com', 'John', 'Doe'),
@@ -18,45 +36,32 @@ class Command(BaseCommand):
             ('mike_wilson', 'mike@example.com', 'Mike', 'Wilson'),
             ('sarah_brown', 'sarah@example.com', 'Sarah', 'Brown'),
         ]
+        usernames = [username for username, *_ in user_data]
+        existing_usernames = set(
+            User.objects.filter(username__in=usernames).values_list('username', flat=True)
+        )
+
+        # Hash the default password once; PBKDF2 dominates user creation otherwise
+        hashed_password = make_password('password123')
 
+        new_users = []
         for username, email, first_name, last_name in user_data:
-            user, created = User.objects.get_or_create(
-                username=username,
-                defaults={
-                    'email': email,
-                    'first_name': first_name,
-                    'last_name': last_name,
-                    'is_staff': True if username == 'admin' else False,
-                    'is_superuser': True if username == 'admin' else False,
-                }
-            )
-            if created:
-                user.set_password('password123')  # Set a default password
-                user.save()
-                self.stdout.write(f"Created user: {username}")
-            else:
+            if username in existing_usernames:
                 self.stdout.write(f"User already exists: {username}")
-            users.append(user)
-
-        # Create categories
-        categories_data = [
-            ('Hardware', 'Hardware-related issues and failures'),
-            ('Software', 'Software bugs and application issues'),
-            ('Network', 'Network connectivity and infrastructure problems'),
-            ('Security', 'Security incidents and breaches'),
-            ('Database', 'Database performance and connectivity issues'),
-            ('User Access', 'Account access and permission issues'),
-        ]
+                continue
+            new_users.append(User(
+                username=username,
+                email=email,
+                first_name=first_name,
+                last_name=last_name,
+                is_staff=username == 'admin',
+                is_superuser=username == 'admin',
+                password=hashed_password,  # Default password
+            ))
+            self.stdout.write(f"Created user: {username}")
 
-        categories = []
-        for name, description in categories_data:
-            category, created = Category.objects.get_or_create(
-                name=name,
-                defaults={'description': description}
-            )
-            if created:
-                self.stdout.write(f"Created category: {name}")
-            categories.append(category)
+        User.objects.bulk_create(new_users, ignore_conflicts=True)
+        users = list(User.objects.filter(username__in=usernames))
 
         # Sample incident data
         incident_templates = [
@@ -64,98 +69,100 @@ class Command(BaseCommand):
                 'title': 'Server CPU Usage High',
                 'description': 'Production server showing consistently high CPU usage above 90%. Performance degradation observed.',
                 'priority': Priority.HIGH,
-                'category': 'Hardware'
+                'category': Category.HARDWARE
             },
             {
                 'title': 'Login Page Not Loading',
                 'description': 'Users reporting that the login page is not loading properly. Getting 500 error intermittently.',
                 'priority': Priority.CRITICAL,
-                'category': 'Software'
+                'category': Category.SOFTWARE
             },
             {
                 'title': 'WiFi Connection Drops',
                 'description': 'Office WiFi connection dropping frequently in the east wing. Multiple users affected.',
                 'priority': Priority.MEDIUM,
-                'category': 'Network'
+                'category': Category.NETWORK
             },
             {
                 'title': 'Suspicious Login Attempts',
                 'description': 'Multiple failed login attempts detected from unusual IP addresses. Possible brute force attack.',
                 'priority': Priority.HIGH,
-                'category': 'Security'
+                'category': Category.SECURITY
             },
             {
                 'title': 'Database Query Timeout',
                 'description': 'Customer database queries timing out during peak hours. Response time exceeded 30 seconds.',
                 'priority': Priority.HIGH,
-                'category': 'Database'
+                'category': Category.SOFTWARE
             },
             {
                 'title': 'User Cannot Access CRM',
                 'description': 'New employee unable to access CRM system. Permissions may not be configured correctly.',
                 'priority': Priority.LOW,
-                'category': 'User Access'
+                'category': Category.SECURITY
             },
             {
                 'title': 'Email Server Down',
                 'description': 'Corporate email server is unresponsive. No emails being sent or received.',
                 'priority': Priority.CRITICAL,
-                'category': 'Network'
+                'category': Category.NETWORK
             },
             {
                 'title': 'Application Memory Leak',
                 'description': 'Customer portal application consuming excessive memory. System restart required every few hours.',
                 'priority': Priority.MEDIUM,
-                'category': 'Software'
+                'category': Category.SOFTWARE
             },
             {
                 'title': 'Backup System Failure',
                 'description': 'Nightly backup process failed for the third consecutive day. Data integrity at risk.',
                 'priority': Priority.HIGH,
-                'category': 'Hardware'
+                'category': Category.HARDWARE
             },
             {
                 'title': 'SSL Certificate Expired',
                 'description': 'SSL certificate for main website has expired. Users seeing security warnings.',
                 'priority': Priority.CRITICAL,
-                'category': 'Security'
+                'category': Category.SECURITY
             },
         ]
 
-        # Create incidents
-        incidents_created = 0
+        # Build incidents in memory and insert them in one bulk_create
+        incidents_to_create = []
+        now = timezone.now()
+        status_choices = [Status.OPEN, Status.IN_PROGRESS, Status.RESOLVED, Status.CLOSED]
+
+        # Draw the random values for every template up front
+        n = len(incident_templates)
+        # Random status (weighted towards open/in_progress for active incidents)
+        statuses = random.choices(status_choices, weights=[0.3, 0.4, 0.2, 0.1], k=n)
+        reporters = random.choices(users, k=n)
+        assignees = random.choices(users, k=n)
+        assigned = [random.random() > 0.2 for _ in range(n)]  # 80% chance of assignment
+        days_ago = [random.randint(1, 30) for _ in range(n)]
+
         for i, template in enumerate(incident_templates):
-            # Find the category object
-            category = next((cat for cat in categories if cat.name == template['category']), None)
-            
             # Random dates for variety
-            days_ago = random.randint(1, 30)
-            created_date = timezone.now() - timedelta(days=days_ago)
-            
-            # Random status (weighted towards open/in_progress for active incidents)
-            status_choices = [Status.OPEN, Status.IN_PROGRESS, Status.RESOLVED, Status.CLOSED]
-            status_weights = [0.3, 0.4, 0.2, 0.1]  # More open/in_progress incidents
-            status = random.choices(status_choices, weights=status_weights)[0]
+            created_date = now - timedelta(days=days_ago[i])
+            status = statuses[i]
             
             # Set resolved_at if status is resolved or closed
             resolved_at = None
             if status in [Status.RESOLVED, Status.CLOSED]:
-                resolved_at = created_date + timedelta(
-                    hours=random.randint(1, 72)  # Resolved within 1-72 hours
-                )
+                # Resolved within 1-72 hours
+                resolved_at = created_date + timedelta(seconds=random.randint(3600, 72 * 3600))
 
-            incident = Incident.objects.create(
+            incidents_to_create.append(Incident(
                 title=template['title'],
                 description=template['description'],
                 priority=template['priority'],
                 status=status,
-                category=category,
-                reporter=random.choice(users),
-                assigned_to=random.choice(users) if random.random() > 0.2 else None,  # 80% chance of assignment
+                category=template['category'],
+                reported_by=reporters[i],
+                assigned_to=assignees[i] if assigned[i] else None,
                 created_at=created_date,
                 resolved_at=resolved_at,
-            )
-            incidents_created += 1
+            ))
 
         # Create some additional random incidents for volume
         additional_titles = [
@@ -171,39 +178,44 @@ class Command(BaseCommand):
             'API Rate Limit Exceeded',
         ]
 
-        for title in additional_titles:
-            days_ago = random.randint(1, 60)
-            created_date = timezone.now() - timedelta(days=days_ago)
-            
-            status = random.choices(
-                [Status.OPEN, Status.IN_PROGRESS, Status.RESOLVED, Status.CLOSED],
-                weights=[0.25, 0.35, 0.25, 0.15]
-            )[0]
+        n = len(additional_titles)
+        statuses = random.choices(status_choices, weights=[0.25, 0.35, 0.25, 0.15], k=n)
+        priorities = random.choices([Priority.LOW, Priority.MEDIUM, Priority.HIGH, Priority.CRITICAL], k=n)
+        incident_categories = random.choices(Category.values, k=n)
+        reporters = random.choices(users, k=n)
+        assignees = random.choices(users, k=n)
+        assigned = [random.random() > 0.3 for _ in range(n)]
+        days_ago = [random.randint(1, 60) for _ in range(n)]
+
+        for i, title in enumerate(additional_titles):
+            created_date = now - timedelta(days=days_ago[i])
+            status = statuses[i]
             
             resolved_at = None
             if status in [Status.RESOLVED, Status.CLOSED]:
-                resolved_at = created_date + timedelta(
-                    hours=random.randint(1, 120)
-                )
+                resolved_at = created_date + timedelta(seconds=random.randint(3600, 120 * 3600))
 
-            Incident.objects.create(
+            incidents_to_create.append(Incident(
                 title=title,
                 description=f"Description for {title}. This is a sample incident created for testing purposes.",
-                priority=random.choice([Priority.LOW, Priority.MEDIUM, Priority.HIGH, Priority.CRITICAL]),
+                priority=priorities[i],
                 status=status,
-                category=random.choice(categories),
-                reporter=random.choice(users),
-                assigned_to=random.choice(users) if random.random() > 0.3 else None,
+                category=incident_categories[i],
+                reported_by=reporters[i],
+                assigned_to=assignees[i] if assigned[i] else None,
                 created_at=created_date,
                 resolved_at=resolved_at,
-            )
-            incidents_created += 1
+            ))
+
+        # bulk_create skips Incident.save(), so resolved_at is set explicitly above
+        incidents_created = len(Incident.objects.bulk_create(incidents_to_create, batch_size=INCIDENT_BULK_BATCH))
+        # ...and skips post_save too, so fill the search documents in one UPDATE
+        Incident.objects.filter(search_vector__isnull=True).update(search_vector=incident_search_vector())
 
         self.stdout.write(
             self.style.SUCCESS(
                 f'Successfully created sample data:\n'
                 f'- {len(users)} users\n'
-                f'- {len(categories)} categories\n'
                 f'- {incidents_created} incidents'
             )
         )
@@ -213,11 +225,4 @@ class Command(BaseCommand):
             '--clear',
             action='store_true',
             help='Clear existing data before creating sample data',
-        )
-
-        if self.options.get('clear'):
-            self.stdout.write('Clearing existing data...')
-            Incident.objects.all().delete()
-            Category.objects.all().delete()
-            User.objects.filter(is_superuser=False).delete()
-            self.stdout.write('Existing data cleared.')
\ No newline at end of file
+        )
\ No newline at end of file
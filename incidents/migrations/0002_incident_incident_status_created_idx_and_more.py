@@ -0,0 +1,34 @@
+# Generated by Django 5.2.3 on 2026-10-15 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("incidents", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="incident",
+            index=models.Index(
+                fields=["status", "-created_at"], name="incident_status_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="incident",
+            index=models.Index(
+                fields=["priority", "-created_at"], name="incident_priority_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="incident",
+            index=models.Index(fields=["category"], name="incident_category_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="incident",
+            index=models.Index(
+                fields=["assigned_to", "status"], name="incident_assignee_status_idx"
+            ),
+        ),
+    ]
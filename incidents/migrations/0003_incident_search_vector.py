@@ -0,0 +1,36 @@
+# Generated by Django 5.2.3 on 2026-10-15 21:05
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+
+def populate_search_vector(apps, schema_editor):
+    Incident = apps.get_model("incidents", "Incident")
+    Incident.objects.update(
+        search_vector=SearchVector("title", weight="A") + SearchVector("description", weight="B")
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("incidents", "0002_incident_incident_status_created_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="incident",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="incident",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="incident_search_vector_idx"
+            ),
+        ),
+        migrations.RunPython(populate_search_vector, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,53 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.utils import timezone
 
+# Cache key of the incident_stats_api payload, cleared whenever an incident changes
+STATS_CACHE_KEY = 'incident_stats_v1'
+
+# Cache key of a counter that is part of every cached incident list count,
+# so bumping it on any incident change retires all of those counts at once
+LIST_GENERATION_CACHE_KEY = 'incident_list_generation'
+
+# Fields that feed Incident.search_vector
+SEARCH_VECTOR_FIELDS = {'title', 'description'}
+
+
+def incident_search_vector():
+    """Weighted tsvector expression stored in Incident.search_vector"""
+    return SearchVector('title', weight='A') + SearchVector('description', weight='B')
+
+
+class Priority(models.TextChoices):
+    """Incident priority levels"""
+    LOW = 'low', 'Low'
+    MEDIUM = 'medium', 'Medium'
+    HIGH = 'high', 'High'
+    CRITICAL = 'critical', 'Critical'
+
+
+class Status(models.TextChoices):
+    """Incident status options"""
+    OPEN = 'open', 'Open'
+    IN_PROGRESS = 'in_progress', 'In Progress'
+    RESOLVED = 'resolved', 'Resolved'
+    CLOSED = 'closed', 'Closed'
+
+
+class Category(models.TextChoices):
+    """Incident categories"""
+    HARDWARE = 'hardware', 'Hardware'
+    SOFTWARE = 'software', 'Software'
+    NETWORK = 'network', 'Network'
+    SECURITY = 'security', 'Security'
+    OTHER = 'other', 'Other'
+
+
 class Incident(models.Model):
     """
     Main incident model to track issues and problems
@@ -9,37 +55,17 @@ class Incident(models.Model):
 
     id = models.AutoField(primary_key=True)
     
-    # Incident priority levels
-    PRIORITY_CHOICES = [
-        ('low', 'Low'),
-        ('medium', 'Medium'),
-        ('high', 'High'),
-        ('critical', 'Critical'),
-    ]
-    
-    # Incident status options
-    STATUS_CHOICES = [
-        ('open', 'Open'),
-        ('in_progress', 'In Progress'),
-        ('resolved', 'Resolved'),
-        ('closed', 'Closed'),
-    ]
-    
-    # Incident categories
-    CATEGORY_CHOICES = [
-        ('hardware', 'Hardware'),
-        ('software', 'Software'),
-        ('network', 'Network'),
-        ('security', 'Security'),
-        ('other', 'Other'),
-    ]
+    # Kept for forms and views that iterate the (value, label) pairs
+    PRIORITY_CHOICES = Priority.choices
+    STATUS_CHOICES = Status.choices
+    CATEGORY_CHOICES = Category.choices
     
     # Basic incident information
     title = models.CharField(max_length=200)
     description = models.TextField()
-    category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default='other')
-    priority = models.CharField(max_length=10, choices=PRIORITY_CHOICES, default='medium')
-    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
+    category = models.CharField(max_length=20, choices=Category.choices, default=Category.OTHER)
+    priority = models.CharField(max_length=10, choices=Priority.choices, default=Priority.MEDIUM)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.OPEN)
     
     # User assignments
     reported_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reported_incidents')
@@ -50,17 +76,44 @@ class Incident(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     resolved_at = models.DateTimeField(null=True, blank=True)
     
+    # Full-text search document, kept in sync by update_search_vector
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Dashboard, list filters and stats filter on status/priority
+            # and order by newest first
+            models.Index(fields=['status', '-created_at'], name='incident_status_created_idx'),
+            models.Index(fields=['priority', '-created_at'], name='incident_priority_created_idx'),
+            models.Index(fields=['category'], name='incident_category_idx'),
+            models.Index(fields=['assigned_to', 'status'], name='incident_assignee_status_idx'),
+            GinIndex(fields=['search_vector'], name='incident_search_vector_idx'),
+        ]
         
     def __str__(self):
         return f"#{self.id} - {self.title}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the searchable text as loaded (deferred fields stay None)
+        instance._search_source = instance._current_search_source()
+        return instance
+    
+    def _current_search_source(self):
+        return tuple(self.__dict__.get(field) for field in sorted(SEARCH_VECTOR_FIELDS))
+    
+    def search_source_changed(self):
+        """Whether title or description differ from the values loaded from the database"""
+        loaded = getattr(self, '_search_source', None)
+        return loaded is None or loaded != self._current_search_source()
+    
     def save(self, *args, **kwargs):
         # Auto-set resolved_at when status changes to resolved
-        if self.status == 'resolved' and not self.resolved_at:
+        if self.status == Status.RESOLVED and not self.resolved_at:
             self.resolved_at = timezone.now()
-        elif self.status != 'resolved':
+        elif self.status != Status.RESOLVED:
             self.resolved_at = None
             
         super().save(*args, **kwargs)
@@ -93,4 +146,29 @@ class IncidentAttachment(models.Model):
     uploaded_at = models.DateTimeField(default=timezone.now)
     
     def __str__(self):
-        return f"Attachment for {self.incident.title}: {self.filename}"
\ No newline at end of file
+        return f"Attachment for {self.incident.title}: {self.filename}"
+
+
+@receiver(post_save, sender=Incident)
+@receiver(post_delete, sender=Incident)
+def invalidate_incident_stats(sender, **kwargs):
+    """Drop the cached statistics and list counts so the next request recomputes them"""
+    cache.delete(STATS_CACHE_KEY)
+    try:
+        cache.incr(LIST_GENERATION_CACHE_KEY)
+    except ValueError:
+        # Not cached yet (or evicted): any new value retires the old counts
+        cache.set(LIST_GENERATION_CACHE_KEY, 1, None)
+
+
+@receiver(post_save, sender=Incident)
+def update_search_vector(sender, instance, created=False, update_fields=None, **kwargs):
+    """Recompute the search document in the database after title/description change"""
+    if update_fields is not None and not SEARCH_VECTOR_FIELDS.intersection(update_fields):
+        return
+    # Status-only edits (views, admin list_editable) leave the vector alone
+    if not created and not instance.search_source_changed():
+        return
+    # The vector is built from column values, so it has to be an UPDATE after the row exists
+    Incident.objects.filter(pk=instance.pk).update(search_vector=incident_search_vector())
+    instance._search_source = instance._current_search_source()
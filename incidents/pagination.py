@@ -0,0 +1,24 @@
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator that caches the COUNT(*) of its queryset for a short time,
+    so paging through the same filtered list does not re-count every page
+    """
+
+    def __init__(self, object_list, per_page, cache_key=None, cache_timeout=60, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.cache_key = cache_key
+        self.cache_timeout = cache_timeout
+
+    def _count_objects(self):
+        return super().count
+
+    @cached_property
+    def count(self):
+        if self.cache_key is None:
+            return self._count_objects()
+        return cache.get_or_set(self.cache_key, self._count_objects, self.cache_timeout)
@@ -1,29 +1,40 @@
+import hashlib
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.paginator import Paginator
-from django.db.models import Q
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import Count, F, Prefetch, Q
+from django.core.cache import cache
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.views.generic import ListView
 from django.contrib.auth.mixins import LoginRequiredMixin
 
-from .models import Incident, IncidentComment
+from .models import (
+    LIST_GENERATION_CACHE_KEY, STATS_CACHE_KEY, Incident, IncidentAttachment, IncidentComment
+)
 from .forms import IncidentForm, IncidentCommentForm, IncidentAttachmentForm
-from .kafka_producer import send_incident_notification, send_status_update_notification
+from .kafka_producer import notify_incident_created, notify_status_updated
+from .pagination import CachedCountPaginator
 
 
 # Dashboard View
 @login_required
 def dashboard(request):
-    incidents = Incident.objects.order_by('-created_at')[:5]
-    stats = {
-        'total': Incident.objects.count(),
-        'open': Incident.objects.filter(status='open').count(),
-        'resolved': Incident.objects.filter(status='resolved').count(),
-        'high_priority': Incident.objects.filter(priority='high').count(),
-    }
+    incidents = Incident.objects.only(
+        'id', 'title', 'status', 'priority', 'created_at'
+    ).order_by('-created_at')[:5]
+    # One uncached scan for all dashboard counters, so new incidents show up
+    # immediately whichever worker serves the page
+    stats = Incident.objects.aggregate(
+        total=Count('id'),
+        open=Count('id', filter=Q(status='open')),
+        resolved=Count('id', filter=Q(status='resolved')),
+        high_priority=Count('id', filter=Q(priority='high')),
+    )
     return render(request, 'incidents/dashboard.html', {
         'incidents': incidents,
         'stats': stats
@@ -39,17 +50,42 @@ class IncidentListView(LoginRequiredMixin, ListView):
     template_name = 'incidents/incident_list.html'
     context_object_name = 'incidents'
     paginate_by = 15
+    paginator_class = CachedCountPaginator
+    
+    def get_paginator(self, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs):
+        return super().get_paginator(
+            queryset, per_page, orphans=orphans, allow_empty_first_page=allow_empty_first_page,
+            cache_key=self.get_count_cache_key(), **kwargs
+        )
+    
+    def get_count_cache_key(self):
+        """
+        Cache key for the row count of the current filters (the page number is
+        ignored). It includes the list generation, which changes on every
+        incident save or delete.
+        """
+        filters = sorted((key, value) for key, value in self.request.GET.items() if key != 'page')
+        if self.request.GET.get('assigned') == 'me':
+            filters.append(('user', self.request.user.pk))
+        digest = hashlib.md5(repr(filters).encode('utf-8'), usedforsecurity=False).hexdigest()
+        generation = cache.get_or_set(LIST_GENERATION_CACHE_KEY, 0, None)
+        return f'incident_list_count:{generation}:{digest}'
     
     def get_queryset(self):
-        queryset = Incident.objects.all()
+        # The list renders assignee names and compares reporter/assignee per row;
+        # only the displayed columns are loaded (descriptions can be large)
+        queryset = Incident.objects.select_related('reported_by', 'assigned_to').only(
+            'id', 'title', 'priority', 'status', 'category', 'created_at',
+            'reported_by__id', 'assigned_to__id', 'assigned_to__username'
+        )
         
-        # Search functionality
+        # Search functionality (full-text match on the GIN-indexed search_vector)
         search = self.request.GET.get('search')
         if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search) | 
-                Q(description__icontains=search)
-            )
+            query = SearchQuery(search, search_type='websearch')
+            queryset = queryset.filter(search_vector=query).annotate(
+                rank=SearchRank(F('search_vector'), query)
+            ).order_by('-rank', '-created_at')
         
         # Filter by status
         status = self.request.GET.get('status')
@@ -75,7 +111,14 @@ def incident_detail(request, incident_id):
     """
     Show detailed view of a single incident with comments and attachments
     """
-    incident = get_object_or_404(Incident, id=incident_id)
+    # Users, comments and attachments (with their authors) in three queries total
+    incident = get_object_or_404(
+        Incident.objects.select_related('reported_by', 'assigned_to').prefetch_related(
+            Prefetch('comments', queryset=IncidentComment.objects.select_related('author')),
+            Prefetch('attachments', queryset=IncidentAttachment.objects.select_related('uploaded_by')),
+        ),
+        id=incident_id
+    )
     comments = incident.comments.all()
     attachments = incident.attachments.all()
 
@@ -131,9 +174,9 @@ def create_incident(request):
             incident.reported_by = request.user
             incident.save()
             
-            # Send notification via Kafka
+            # Send notification via Kafka once the incident is committed
             try:
-                send_incident_notification(incident)
+                notify_incident_created(incident.id)
             except Exception as e:
                 # Log error but don't fail the request
                 print(f"Failed to send Kafka notification: {e}")
@@ -170,7 +213,7 @@ def update_incident(request, incident_id):
             # Check if status changed and send Kafka notification
             if old_status != updated_incident.status:
                 try:
-                    send_status_update_notification(updated_incident, old_status, updated_incident.status)
+                    notify_status_updated(updated_incident.id, old_status, updated_incident.status)
                 except Exception as e:
                     # Log error but don't fail the request
                     print(f"Failed to send status update notification: {e}")
@@ -187,31 +230,28 @@ def update_incident(request, incident_id):
     return render(request, 'incidents/update_incident.html', context)
 
 
+def _compute_stats():
+    """
+    Count incidents per status, priority and category
+    """
+    # One GROUP BY per dimension; choices with no incidents report 0
+    by_status = dict(Incident.objects.order_by().values_list('status').annotate(c=Count('id')))
+    by_priority = dict(Incident.objects.order_by().values_list('priority').annotate(c=Count('id')))
+    by_category = dict(Incident.objects.order_by().values_list('category').annotate(c=Count('id')))
+    
+    return {
+        'by_status': {status: by_status.get(status, 0) for status, _ in Incident.STATUS_CHOICES},
+        'by_priority': {priority: by_priority.get(priority, 0) for priority, _ in Incident.PRIORITY_CHOICES},
+        'by_category': {category: by_category.get(category, 0) for category, _ in Incident.CATEGORY_CHOICES},
+    }
+
+
 # API endpoint for incident statistics (for dashboard charts)
 @login_required
 def incident_stats_api(request):
     """
     API endpoint to get incident statistics for charts
     """
-    stats = {
-        'by_status': {
-            'open': Incident.objects.filter(status='open').count(),
-            'in_progress': Incident.objects.filter(status='in_progress').count(),
-            'resolved': Incident.objects.filter(status='resolved').count(),
-            'closed': Incident.objects.filter(status='closed').count(),
-        },
-        'by_priority': {
-            'low': Incident.objects.filter(priority='low').count(),
-            'medium': Incident.objects.filter(priority='medium').count(),
-            'high': Incident.objects.filter(priority='high').count(),
-            'critical': Incident.objects.filter(priority='critical').count(),
-        },
-        'by_category': {}
-    }
-    
-    # Get category stats
-    for category, _ in Incident.CATEGORY_CHOICES:
-        stats['by_category'][category] = Incident.objects.filter(category=category).count()
-    
+    # Shared by all users; invalidated by the Incident save/delete signals
+    stats = cache.get_or_set(STATS_CACHE_KEY, _compute_stats, 60)
     return JsonResponse(stats)
-